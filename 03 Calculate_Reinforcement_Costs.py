@@ -1,8 +1,10 @@
-from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy, deepcopy
+from functools import lru_cache
 import os
 import pandas as pd
-import random
 import traceback
+from numba import njit
 import numpy as np
 
 import edisgo
@@ -47,6 +49,31 @@ name_dict ={
     '00_pricing_dynamic_operation_dynamic_fi_fit_ne_volumetric_gridch_False_HPnew.pkl': "Volumetric_FIT",
 }
 check_existence = True
+orig_seed = 2022
+# number of tariff cases that are calculated in parallel
+nr_workers = max((os.cpu_count() or 2) // 2, 1)
+
+
+@lru_cache(maxsize=32)
+def load_time_series(file_name):
+    """
+    Loads time series of households from pickle in res_dir and converts them from W to
+    kW. The values are stored as column-major float32 array next to the pickle on first
+    access, later accesses memory-map this array instead of unpickling the file again.
+
+    :param file_name: name of the pickle file in res_dir
+    :return: np.ndarray of shape (time steps, households)
+    """
+    path = os.path.join(res_dir, file_name)
+    path_array = path + ".f32.npy"
+    if not os.path.isfile(path_array) or \
+            os.path.getmtime(path_array) < os.path.getmtime(path):
+        ts = pd.read_pickle(path).divide(1000)
+        # write to a temporary file first, so that no partly written array is mapped
+        with open(path_array + ".tmp", "wb") as file:
+            np.save(file, np.asfortranarray(ts.values, dtype=np.float32))
+        os.replace(path_array + ".tmp", path_array)
+    return np.load(path_array, mmap_mode="r")
 
 
 def get_grid_issues(edisgo_obj):
@@ -99,9 +126,34 @@ def adapt_time_series(
     return edisgo_object
 
 
-grids = os.listdir(grid_dir)
-orig_seed = 2022
-random.seed(orig_seed)
+@njit(cache=True, fastmath=True)
+def _split_load_and_feedin_kernel(values, load, feedin):
+    for j in range(values.shape[1]):
+        for i in range(values.shape[0]):
+            value = values[i, j]
+            if value > 0:
+                load[i, j] = value
+                feedin[i, j] = 0.0
+            else:
+                load[i, j] = 0.0
+                feedin[i, j] = -value
+
+
+def split_load_and_feedin(values):
+    """
+    Splits time series into effective load and effective feed-in, both positive, in a
+    single pass over values. The kernel is single-threaded, as cases already run in
+    parallel worker processes.
+
+    :param values: np.ndarray of shape (time steps, loads)
+    :return: tuple of effective load and effective feed-in
+    """
+    load = np.empty_like(values, order="F")
+    feedin = np.empty_like(values, order="F")
+    _split_load_and_feedin_kernel(values, load, feedin)
+    return load, feedin
+
+
 # define load and feed-in days
 ts_dict = {
     "feed-in": pd.date_range(start="2011-04-10", periods=24, freq="1h").append(
@@ -118,164 +170,326 @@ ts_dict = {
                     pd.date_range(start="2011-01-26", periods=24, freq="1h")),
     "full": pd.date_range(start="2011-01-01", periods=8760, freq="1h")
 }
+# sort time steps so that they can be located in the full year via np.searchsorted
+ts_dict = {key: timeindex.sort_values() for key, timeindex in ts_dict.items()}
+ts_dict_np = {key: timeindex.values for key, timeindex in ts_dict.items()}
 
 
 def adapt_edisgo_timeseries_with_dynamic_tariffs(
         edisgo_object, res_loads, timeseries_dict, ts_mode, nr_res_loads, share_dynamic,
-        ts_const, ts_dyn, order_loads):
+        ts_const, ts_dyn, order_loads, loads_active_power_mode, positions_res_loads,
+        ts_const_min, ts_dyn_min):
     edisgo_object.timeseries.timeindex = timeseries_dict[ts_mode]
     nr_loads_dyn = int(nr_res_loads * share_dynamic)
-    loads_dyn = ts_const.iloc[:, order_loads[:nr_loads_dyn]].columns
-    loads_constant = \
-        ts_const.columns[~ts_const.columns.isin(loads_dyn)]
-    ts_new = pd.concat([ts_const[loads_constant],
-                        ts_dyn[loads_dyn]], axis=1)
-    ts_new.columns = res_loads.index
-    # split into effective load and effective feed-in
-    ts_effective_load = ts_new[ts_new > 0].fillna(0)
-    ts_effective_feedin = ts_new[ts_new < 0].fillna(0)
-    names_pv = ["PV_" + col for col in ts_effective_feedin.columns]
-    ts_effective_feedin.columns = names_pv
-    generators = edisgo_object.topology.generators_df.copy()
-    new_pv = pd.DataFrame(index=names_pv, columns=generators.columns)
-    new_pv.bus = \
-        edisgo_object.topology.loads_df.loc[ts_effective_load.columns, "bus"].values
-    new_pv.p_nom = -ts_effective_feedin.min()
-    new_pv.type = "solar"
-    new_pv.control = "PQ"
-    new_pv.subtype = "residential_pv"
-    new_pv.voltage_level = "lv"
-    # update loads
-    ts_loads_active_power_new = \
-        edisgo_object.timeseries.loads_active_power.copy()
-    ts_loads_active_power_new.update(ts_effective_load)
-    edisgo_object.timeseries.loads_active_power = ts_loads_active_power_new
-    # add new generators
-    edisgo_object.topology.generators_df = \
-        pd.concat([edisgo_object.topology.generators_df, new_pv])
-    edisgo_object.timeseries.generators_active_power = pd.concat([
-        edisgo_object.timeseries.generators_active_power, -ts_effective_feedin
-    ], axis=1)
+    # constant loads first, followed by dynamic loads in the order of order_loads
+    positions_dyn = order_loads[:nr_loads_dyn]
+    mask_constant = np.ones(ts_const.shape[1], dtype=bool)
+    mask_constant[positions_dyn] = False
+    positions_constant = np.flatnonzero(mask_constant)
+    nr_loads_constant = len(positions_constant)
+    values_const = ts_const.to_numpy()
+    if nr_loads_dyn == 0:
+        values_new = values_const
+    elif nr_loads_constant == 0:
+        values_new = np.asfortranarray(ts_dyn.to_numpy()[:, positions_dyn])
+    else:
+        values_new = np.empty_like(values_const, order="F")
+        values_new[:, :nr_loads_constant] = values_const[:, positions_constant]
+        values_new[:, nr_loads_constant:] = ts_dyn.to_numpy()[:, positions_dyn]
+    # split into effective load and effective feed-in (positive values), everything up
+    # to here is float32, edisgo gets float64
+    values_load, values_feedin = split_load_and_feedin(values_new)
+    # maximum feed-in per load follows from the minima of the tariff time series
+    feedin_max = -np.concatenate([ts_const_min[positions_constant],
+                                  ts_dyn_min[positions_dyn]]).clip(max=0)
+    names_pv = ["PV_" + col for col in res_loads.index]
+    # update loads, residential loads are overwritten in a copy of the cached loads
+    # of the mode, which is not changed itself
+    values_loads = loads_active_power_mode.to_numpy(copy=True)
+    values_loads[:, positions_res_loads] = values_load
+    edisgo_object.timeseries.loads_active_power = pd.DataFrame(
+        values_loads, index=loads_active_power_mode.index,
+        columns=loads_active_power_mode.columns, copy=False)
+    # update residential PV, which is already part of the base grid
+    edisgo_object.topology.generators_df.loc[names_pv, "p_nom"] = \
+        feedin_max.astype(np.float64)
+    ts_generators_active_power_new = edisgo_object.timeseries.generators_active_power
+    ts_generators_active_power_new.loc[ts_const.index, names_pv] = \
+        values_feedin.astype(np.float64)
+    edisgo_object.timeseries.generators_active_power = ts_generators_active_power_new
     # set reactive powers
     edisgo_object.set_time_series_reactive_power_control()
-    edisgo_obj.check_integrity()
 
-ts_ref = pd.read_pickle(os.path.join(res_dir, file_name_ref)).divide(1000)
 
-for grid_id in sorted(grids):
+def add_residential_pv(edisgo_object, res_loads):
+    """
+    Adds a PV generator without nominal power and feed-in at the bus of every residential
+    load. The tariff cases only set p_nom and feed-in of these generators, so that
+    generators_df and generators_active_power do not have to grow in every case.
+
+    :param edisgo_object: grid container object
+    :param res_loads: residential loads
+    """
+    names_pv = ["PV_" + col for col in res_loads.index]
+    generators = edisgo_object.topology.generators_df
+    new_pv = pd.DataFrame({
+        "bus": res_loads.bus.values,
+        "p_nom": 0.0,
+        "type": "solar",
+        "control": "PQ",
+        "subtype": "residential_pv",
+        "voltage_level": "lv",
+    }, index=names_pv).reindex(columns=generators.columns)
+    edisgo_object.topology.generators_df = pd.concat([generators, new_pv])
+    ts_generators_active_power = edisgo_object.timeseries.generators_active_power
+    edisgo_object.timeseries.generators_active_power = pd.concat([
+        ts_generators_active_power,
+        pd.DataFrame(0.0, index=ts_generators_active_power.index, columns=names_pv)
+    ], axis=1)
+
+
+def copy_edisgo_object(edisgo_object):
+    """
+    Returns a working copy of edisgo_object for one calculation. Only the topology, which
+    is changed in place during reinforcement, is copied deeply. The time series frames are
+    shared with edisgo_object as they are only ever reassigned, never changed in place.
+
+    :param edisgo_object: grid container object that should stay unchanged
+    :return: edisgo.EDisGo
+    """
+    edisgo_copy = copy(edisgo_object)
+    edisgo_copy.topology = deepcopy(edisgo_object.topology,
+                                    {id(edisgo_object): edisgo_copy})
+    edisgo_copy.timeseries = copy(edisgo_object.timeseries)
+    edisgo_copy.results = Results(edisgo_copy)
+    return edisgo_copy
+
+
+@lru_cache(maxsize=1)
+def load_base_grid(grid_id):
+    """
+    Imports the reinforced base grid of grid_id, which all tariff cases start from, and
+    adds residential PV. The result is cached, so that every worker process imports a
+    grid only once.
+
+    :param grid_id: id of the grid
+    :return: tuple of grid container object, its residential loads and their
+        positions in the columns of the load time series
+    """
+    edisgo_base = import_edisgo_from_files(
+        os.path.join(res_dir, "grid_reinforcement_results", grid_id, "base"),
+        import_timeseries=True)
+    residential_loads = edisgo_base.topology.loads_df.loc[
+        edisgo_base.topology.loads_df.sector == "residential"
+    ]
+    positions_residential_loads = edisgo_base.timeseries.loads_active_power.columns \
+        .get_indexer(residential_loads.index)
+    if (positions_residential_loads < 0).any():
+        raise ValueError(
+            f"Residential loads of grid {grid_id} without active power time series: "
+            f"{list(residential_loads.index[positions_residential_loads < 0])}.")
+    add_residential_pv(edisgo_base, residential_loads)
+    # check resulting edisgo object once, the tariff cases only change time series
+    edisgo_base.check_integrity()
+    return edisgo_base, residential_loads, positions_residential_loads
+
+
+@lru_cache(maxsize=3)
+def get_loads_active_power_mode(grid_id, mode):
+    """
+    Returns active power of all loads of the base grid of grid_id for the time steps of
+    mode as frame with a single float64 block. All cases of a grid and mode start from
+    a copy of this frame, instead of slicing the full year load time series each time.
+
+    :param grid_id: id of the grid
+    :param mode: key of ts_dict determining the time steps
+    :return: pd.DataFrame
+    """
+    edisgo_orig = load_base_grid(grid_id)[0]
+    loads_active_power = edisgo_orig.timeseries.loads_active_power.loc[ts_dict[mode]]
+    return pd.DataFrame(loads_active_power.to_numpy(dtype=np.float64, copy=True),
+                        index=loads_active_power.index,
+                        columns=loads_active_power.columns)
+
+
+@lru_cache(maxsize=1)
+def get_load_assignment(grid_id):
+    """
+    Draws the household profiles assigned to the residential loads of grid_id and the
+    order in which the loads adopt the dynamic tariff. The generator is seeded with the
+    grid id, so that every worker process draws the same values for a grid.
+
+    :param grid_id: id of the grid
+    :return: tuple of profile positions and adoption order, both np.ndarray
+    """
+    nr_residential_loads = len(load_base_grid(grid_id)[1])
+    rng = np.random.default_rng([orig_seed, int(grid_id)])
+    loads_index = rng.integers(
+        0, load_time_series(file_name_ref).shape[1], nr_residential_loads)
+    loads_order = rng.permutation(nr_residential_loads)
+    return loads_index, loads_order
+
+
+@lru_cache(maxsize=64)
+def get_tariff_time_series(grid_id, file_name, mode):
+    """
+    Returns time series of file_name for the residential loads of grid_id, restricted
+    to the time steps of mode, together with the minimum of each column. The result is
+    cached, as all shares of dynamic loads of a tariff and mode use the same time series.
+    Column-major arrays end up as a single contiguous block per frame in pandas.
+
+    :param grid_id: id of the grid
+    :param file_name: name of the pickle file in res_dir
+    :param mode: key of ts_dict determining the time steps
+    :return: tuple of pd.DataFrame and np.ndarray
+    """
+    edisgo_orig = load_base_grid(grid_id)[0]
+    timeindex = edisgo_orig.timeseries.timeindex.values
+    timesteps = np.searchsorted(timeindex, ts_dict_np[mode])
+    if (timesteps >= len(timeindex)).any() or \
+            (timeindex[timesteps.clip(max=len(timeindex) - 1)] != ts_dict_np[mode]).any():
+        raise ValueError(f"Time steps of mode {mode} are missing in the time index of "
+                         f"grid {grid_id}.")
+    loads_index = get_load_assignment(grid_id)[0]
+    positions_mode = np.ix_(timesteps, loads_index)
+    ts = pd.DataFrame(np.asfortranarray(load_time_series(file_name)[positions_mode]),
+                      index=ts_dict[mode], columns=range(len(loads_index)))
+    return ts, ts.to_numpy().min(axis=0)
+
+
+def calculate_tariff_case(
+        grid_id, file_name_constant, file_name_dynamic, share_dyn, mode, res_dir_case):
+    """
+    Runs power flow and reinforcement of one grid for one combination of tariff, share
+    of dynamic loads and time series mode and writes the results to res_dir_case. Cases
+    are independent of each other and are calculated in separate worker processes.
+
+    :param grid_id: id of the grid
+    :param file_name_constant: file with time series following the constant tariff
+    :param file_name_dynamic: file with time series following the dynamic tariff
+    :param share_dyn: share of residential loads following the dynamic tariff
+    :param mode: key of ts_dict determining the analysed time steps
+    :param res_dir_case: directory the results are written to
+    """
+    print(f"Starting analysis for {grid_id}-{mode} for tariff "
+          f"{name_dict[file_name_dynamic]}-{share_dyn}.")
     try:
-        int(grid_id)
-    except ValueError:
-        continue
-    print(f"Starting calculation of reinforcement costs for grid {grid_id}.")
-    # try:
-    if os.path.isdir(
-            r"output\grid_reinforcement_results\{}\base\topology".format(grid_id)):
-        edisgo_obj = import_edisgo_from_files(
-            r"output\grid_reinforcement_results\{}\base".format(grid_id),
-            import_timeseries=True)
-    else:
-        # import grid
-        grid_dir_tmp = f"{grid_dir}/{grid_id}/grid_data_eGon2021.zip"
-
-        edisgo_obj = import_edisgo_from_files(grid_dir_tmp, import_timeseries=True)
-
-        # set time series for conventional generators, produce at full capacity
-        conventional_gens = edisgo_obj.topology.generators_df.loc[
-            ~edisgo_obj.topology.generators_df.index.isin(
-                edisgo_obj.timeseries.generators_active_power.columns)
-        ]
-        conventional_gens_p = pd.DataFrame(index=edisgo_obj.timeseries.timeindex,
-                                           columns=conventional_gens.index)
-        conventional_gens_p[conventional_gens.index] = conventional_gens.p_nom
-        edisgo_obj.set_time_series_manual(generators_p=conventional_gens_p)
-
-        # set reactive powers
-        edisgo_obj.set_time_series_reactive_power_control()
-
-        # check resulting edisgo object
-        edisgo_obj.check_integrity()
+        edisgo_orig, residential_loads, positions_residential_loads = \
+            load_base_grid(grid_id)
+        nr_residential_loads = len(residential_loads)
+        # add new time series, restricted to the time steps of the mode
+        ts_constant, ts_constant_min = get_tariff_time_series(
+            grid_id, file_name_constant, mode)
+        ts_dynamic, ts_dynamic_min = get_tariff_time_series(
+            grid_id, file_name_dynamic, mode)
+        edisgo_obj = copy_edisgo_object(edisgo_orig)
+        adapt_edisgo_timeseries_with_dynamic_tariffs(
+            edisgo_object=edisgo_obj,
+            res_loads=residential_loads,
+            timeseries_dict=ts_dict,
+            ts_mode=mode,
+            nr_res_loads=nr_residential_loads,
+            share_dynamic=share_dyn,
+            ts_const=ts_constant,
+            ts_dyn=ts_dynamic,
+            order_loads=get_load_assignment(grid_id)[1],
+            loads_active_power_mode=get_loads_active_power_mode(grid_id, mode),
+            positions_res_loads=positions_residential_loads,
+            ts_const_min=ts_constant_min,
+            ts_dyn_min=ts_dynamic_min
+        )
+        edisgo_obj.analyze()
+        voltage_diff, crit_lines_score = get_grid_issues(edisgo_obj)
+        os.makedirs(
+            f"{res_dir_case}/results_before_reinforcement", exist_ok=True)
+        voltage_diff.to_parquet(
+            f"{res_dir_case}/results_before_reinforcement/voltage_diff.parquet",
+            engine="pyarrow", compression="snappy")
+        crit_lines_score.to_parquet(
+            f"{res_dir_case}/results_before_reinforcement/overloading.parquet",
+            engine="pyarrow", compression="snappy")
         try:
-            edisgo_obj.reinforce(reduced_analysis=True, catch_convergence_problems=True)
+            edisgo_obj.reinforce(reduced_analysis=True,
+                                 catch_convergence_problems=True)
         except:
             enhanced_reinforce_grid(edisgo_obj, reduced_analysis=True)
+        edisgo_obj.analyze()
         edisgo_obj.results.to_csv(
-            f"{res_dir}/grid_reinforcement_results/{grid_id}/base",
-            parameters={"grid_expansion_results": ["grid_expansion_costs",
-                                                   "unresolved_issues"]})
-        edisgo_obj.save(f"{res_dir}/grid_reinforcement_results/{grid_id}/base",
-                        save_results=False)
-        edisgo_obj.results = Results(edisgo_obj)
-    edisgo_orig = deepcopy(edisgo_obj)
-
-    # extract residential loads
-    residential_loads = edisgo_obj.topology.loads_df.loc[
-        edisgo_obj.topology.loads_df.sector == "residential"
-    ]
-    nr_residential_loads = len(residential_loads)
-    loads_index = np.random.randint(0, len(ts_ref.columns), nr_residential_loads)
-    loads_order = random.sample(range(nr_residential_loads), nr_residential_loads)
-
-
-    for file_name_dynamic, file_name_constant in \
-            zip(files_name_dynamic, files_name_constant):
-        # add new time series
-        ts_constant_orig = \
-            pd.read_pickle(os.path.join(res_dir, file_name_constant)).divide(1000)
-
-        ts_constant = ts_constant_orig.iloc[:, loads_index]
-        ts_constant.index = edisgo_orig.timeseries.timeindex
-        ts_constant.columns = range(nr_residential_loads)
-        ts_dynamic_orig = \
-            pd.read_pickle(os.path.join(res_dir, file_name_dynamic)).divide(1000)
-        ts_dynamic = ts_dynamic_orig.iloc[:, loads_index]
-        ts_dynamic.index = edisgo_orig.timeseries.timeindex
-        ts_dynamic.columns = range(nr_residential_loads)
-        # vary share of dynamically controlled loads
-        for share_dyn in [0.0, 0.25, 0.5, 0.75, 1.0]:
-            for mode in ["feed-in", "load", "debug"]:
-                print(f"Starting analysis for {grid_id}-{mode} for tariff "
-                      f"{name_dict[file_name_dynamic]}-{share_dyn}.")
+            f"{res_dir_case}", parameters={'grid_expansion_results': None})
+    except Exception:
+        print(f"Something went wrong with grid {grid_id}-{mode} for "
+              f"tariff {name_dict[file_name_dynamic]}-{share_dyn}.")
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    grids = sorted(entry.name for entry in os.scandir(grid_dir)
+                   if entry.name.isdigit() and entry.is_dir())
+    # create cached arrays before worker processes access them
+    for file_name in [file_name_ref] + files_name_constant + files_name_dynamic:
+        load_time_series(file_name)
+
+    with ProcessPoolExecutor(max_workers=nr_workers) as executor:
+        for grid_id in grids:
+            print(f"Starting calculation of reinforcement costs for grid {grid_id}.")
+            base_dir = \
+                os.path.join(res_dir, "grid_reinforcement_results", grid_id, "base")
+            # workers import the saved base grid themselves, the main process only
+            # creates it if it does not exist yet
+            if not os.path.isdir(os.path.join(base_dir, "topology")):
+                # import grid
+                grid_dir_tmp = f"{grid_dir}/{grid_id}/grid_data_eGon2021.zip"
+
+                edisgo_obj = \
+                    import_edisgo_from_files(grid_dir_tmp, import_timeseries=True)
+
+                # set time series for conventional generators, produce at full capacity
+                conventional_gens = edisgo_obj.topology.generators_df.loc[
+                    ~edisgo_obj.topology.generators_df.index.isin(
+                        edisgo_obj.timeseries.generators_active_power.columns)
+                ]
+                conventional_gens_p = pd.DataFrame(index=edisgo_obj.timeseries.timeindex,
+                                                   columns=conventional_gens.index)
+                conventional_gens_p[conventional_gens.index] = conventional_gens.p_nom
+                edisgo_obj.set_time_series_manual(generators_p=conventional_gens_p)
+
+                # set reactive powers
+                edisgo_obj.set_time_series_reactive_power_control()
+
+                # check resulting edisgo object
+                edisgo_obj.check_integrity()
                 try:
-                    res_dir_tmp = \
-                        os.path.join(res_dir, "grid_reinforcement_results", str(grid_id),
-                                     name_dict[file_name_dynamic], str(share_dyn), mode)
-                    if check_existence:
-                        if os.path.isdir(f"{res_dir_tmp}/grid_expansion_results"):
-                            print(f"{grid_id}-{mode} for tariff "
-                                  f"{name_dict[file_name_dynamic]}-{share_dyn} already "
-                                  f"solved. Skipping.")
-                            continue
-                    edisgo_obj = deepcopy(edisgo_orig)
-                    adapt_edisgo_timeseries_with_dynamic_tariffs(
-                        edisgo_object=edisgo_obj,
-                        res_loads=residential_loads,
-                        timeseries_dict=ts_dict,
-                        ts_mode=mode,
-                        nr_res_loads=nr_residential_loads,
-                        share_dynamic=share_dyn,
-                        ts_const=ts_constant,
-                        ts_dyn=ts_dynamic,
-                        order_loads=loads_order
-                    )
-                    edisgo_obj.analyze()
-                    voltage_diff, crit_lines_score = get_grid_issues(edisgo_obj)
-                    os.makedirs(
-                        f"{res_dir_tmp}/results_before_reinforcement", exist_ok=True)
-                    voltage_diff.to_csv(
-                        f"{res_dir_tmp}/results_before_reinforcement/voltage_diff.csv")
-                    crit_lines_score.to_csv(
-                        f"{res_dir_tmp}/results_before_reinforcement/overloading.csv")
-                    try:
-                        edisgo_obj.reinforce(reduced_analysis=True,
-                                             catch_convergence_problems=True)
-                    except:
-                        enhanced_reinforce_grid(edisgo_obj, reduced_analysis=True)
-                    edisgo_obj.analyze()
-                    edisgo_obj.results.to_csv(
-                        f"{res_dir_tmp}", parameters={'grid_expansion_results': None})
-                except Exception:
-                    print(f"Something went wrong with grid {grid_id}-{mode} for "
-                          f"tariff {name_dict[file_name_dynamic]}-{share_dyn}.")
-                    traceback.print_exc()
-print("Success")
+                    edisgo_obj.reinforce(reduced_analysis=True,
+                                         catch_convergence_problems=True)
+                except:
+                    enhanced_reinforce_grid(edisgo_obj, reduced_analysis=True)
+                edisgo_obj.results.to_csv(
+                    base_dir,
+                    parameters={"grid_expansion_results": ["grid_expansion_costs",
+                                                           "unresolved_issues"]})
+                edisgo_obj.save(base_dir, save_results=False)
+                del edisgo_obj
+
+            # submit all tariff cases of the grid and wait for them before moving on,
+            # so that workers only hold one grid at a time
+            futures = []
+            for file_name_dynamic, file_name_constant in \
+                    zip(files_name_dynamic, files_name_constant):
+                for mode in ["feed-in", "load", "debug"]:
+                    # vary share of dynamically controlled loads
+                    for share_dyn in [0.0, 0.25, 0.5, 0.75, 1.0]:
+                        res_dir_tmp = os.path.join(
+                            res_dir, "grid_reinforcement_results", grid_id,
+                            name_dict[file_name_dynamic], str(share_dyn), mode)
+                        if check_existence:
+                            if os.path.isdir(f"{res_dir_tmp}/grid_expansion_results"):
+                                print(f"{grid_id}-{mode} for tariff "
+                                      f"{name_dict[file_name_dynamic]}-{share_dyn} "
+                                      f"already solved. Skipping.")
+                                continue
+                        futures.append(executor.submit(
+                            calculate_tariff_case, grid_id, file_name_constant,
+                            file_name_dynamic, share_dyn, mode, res_dir_tmp))
+            for future in futures:
+                future.result()
+    print("Success")